@@ -15,13 +15,14 @@ import os
 # Add the parent directory to the path so we can import our rpc module
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from rpc import Client
+from rpc import get_client
 
 
 def main():
     try:
-        # Creating a client that connects to localhost on port 8080
-        client = Client("192.168.1.102", 8080)
+        # Getting the shared client for the server on port 8080; calling
+        # get_client() again reuses its open connections
+        client = get_client("192.168.1.102", 8080)
         
         print("Connected to RPC server!")
         print("Testing various RPC calls...\n")
@@ -54,8 +55,7 @@ def main():
         except RuntimeError as e:
             print(f"\nExpected error for nonexistent method: {e}")
         
-        # Close the connection
-        client.close()
+        # The connection is closed at exit (or earlier with rpc.shutdown())
         
     except ConnectionError as e:
         print(f"Failed to connect to server: {e}")
@@ -5,8 +5,53 @@ This library provides both server and client implementations for RPC communicati
 using MessagePack for serialization and TCP sockets for transport.
 """
 
-from .server import Server
+import atexit
+import threading
+from typing import Dict, Tuple
+
+from .server import Server, constant
 from .client import Client
 
 __version__ = "1.0.0"
-__all__ = ["Server", "Client"] 
\ No newline at end of file
+__all__ = ["Server", "Client", "constant", "get_client", "shutdown"]
+
+# Shared clients by (host, port), so repeated get_client() calls reuse their connections
+_CLIENTS: Dict[Tuple[str, int], Client] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(host: str, port: int) -> Client:
+    """
+    Get the shared client for a server, connecting on first use.
+    
+    Later calls with the same host and port return the same client (and its
+    pool of open connections) until it is closed.
+    
+    Args:
+        host: Server hostname or IP address
+        port: Server port number
+    
+    Returns:
+        A connected Client
+    """
+    key = (host, port)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None or not client.connected:
+            client = Client(host, port)
+            _CLIENTS[key] = client
+        return client
+
+
+def shutdown() -> None:
+    """
+    Close every client handed out by get_client(); called automatically at exit.
+    """
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,202 @@
+"""
+Length-prefixed framing shared by the client and the server
+
+Every message on the wire is prefixed with a header holding its length as
+a 4-byte big-endian integer and a one-byte frame type. The low 4 bits of the
+type are the id of the codec the frame is encoded with (see rpc.codecs), the
+high 4 bits say what kind of frame it is:
+    
+    MESSAGE  a codec-encoded Request/Response, or a list of them
+    CALL     varint method id, varint request id, codec-encoded params
+    RESULT   varint request id, codec-encoded result (the answer to a CALL)
+    RESOLVE  a codec-encoded method name; answered by a MESSAGE whose result
+             is the method id to use in CALL frames
+    HELLO    varint protocol version; answered by a HELLO with the server's
+             version (codec id 0, since no codec is involved)
+
+CALL and RESULT frames avoid sending the method name and the "method",
+"params", "result" and "id" keys with every call.
+
+Call params always take the form [args] or [args, kwargs]. The client sends
+HELLO on every new connection and refuses servers speaking another version
+of the protocol.
+"""
+
+import socket
+import struct
+from typing import Dict, Tuple, Union
+
+HEADER = struct.Struct(">IB")
+
+PROTOCOL_VERSION = 2
+
+MESSAGE = 0x00
+CALL = 0x10
+RESULT = 0x20
+RESOLVE = 0x30
+HELLO = 0x40
+KIND_MASK = 0xF0
+CODEC_MASK = 0x0F
+
+# Largest frame payload accepted from the peer; the length comes from the
+# wire, so it is checked before any buffer is sized from it
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# sendmsg() is not available everywhere (e.g. Windows)
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Encode a non-negative integer as a varint: 7 bits per byte, least
+    significant group first, with the high bit set on all but the last byte.
+    """
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(buf: Union[bytes, memoryview], pos: int) -> Tuple[int, int]:
+    """
+    Decode a varint starting at buf[pos].
+    
+    Returns:
+        Tuple of the value and the position just after it
+    
+    Raises:
+        IndexError: If the buffer ends in the middle of the varint
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def check_frame_length(length: int) -> None:
+    """
+    Reject a frame length read from a header before buffering the frame.
+    
+    Raises:
+        ConnectionError: If the length exceeds MAX_FRAME_SIZE
+    """
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionError(f"Frame of {length} bytes exceeds the limit of {MAX_FRAME_SIZE} bytes")
+
+
+class Connection:
+    """
+    A socket carrying length-prefixed frames.
+    
+    Data is received with recv_into() into one reusable buffer, and frames are
+    handed out as memoryview slices of it, so receiving a message allocates
+    nothing. Frames that arrive together in one recv are returned one by one
+    without further syscalls.
+    """
+    
+    def __init__(self, sock: socket.socket, buffer_size: int = 65536):
+        """
+        Initialize the connection.
+        
+        Args:
+            sock: A connected socket
+            buffer_size: Initial size of the receive buffer (grows for larger frames)
+        """
+        self.sock = sock
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._start = 0  # first byte not yet handed out
+        self._end = 0    # end of the received data
+        # Method ids resolved on this connection (client side); they are only
+        # valid for the server process at the other end
+        self.method_ids: Dict[str, int] = {}
+    
+    def send_frame(self, payload: bytes, frame_type: int = MESSAGE, prefix: bytes = b"") -> None:
+        """
+        Send one length-prefixed frame.
+        
+        Where available, the header, prefix and payload are handed to the
+        kernel together with sendmsg() instead of being concatenated first.
+        
+        Args:
+            payload: The frame payload
+            frame_type: Frame kind combined with the codec id
+            prefix: Bytes sent before the payload (e.g. the varints of a CALL)
+        """
+        header = HEADER.pack(len(prefix) + len(payload), frame_type)
+        if not _HAS_SENDMSG:
+            self.sock.sendall(header + prefix + payload)
+            return
+        
+        buffers = [memoryview(header), memoryview(prefix), memoryview(payload)]
+        sent = self.sock.sendmsg(buffers)
+        for buf in buffers:
+            # Short write: send whatever is left of each buffer
+            if sent >= len(buf):
+                sent -= len(buf)
+                continue
+            self.sock.sendall(buf[sent:])
+            sent = 0
+    
+    def recv_frame(self) -> Tuple[int, memoryview]:
+        """
+        Receive one length-prefixed frame.
+        
+        Returns:
+            Tuple of the frame type and the frame payload; the payload is only
+            valid until the next recv_frame() call
+        
+        Raises:
+            ConnectionError: If the peer closes the connection or announces
+                a frame larger than MAX_FRAME_SIZE
+        """
+        self._fill(HEADER.size)
+        length, frame_type = HEADER.unpack_from(self._buf, self._start)
+        check_frame_length(length)
+        self._fill(HEADER.size + length)
+        
+        payload_start = self._start + HEADER.size
+        self._start = payload_start + length
+        return frame_type, self._view[payload_start:self._start]
+    
+    def _fill(self, n: int) -> None:
+        """
+        Receive until at least n unread bytes are buffered.
+        """
+        if self._start == self._end:
+            # Everything was consumed: start over at the front of the buffer
+            self._start = self._end = 0
+        
+        if self._end - self._start >= n:
+            return
+        
+        if self._start + n > len(self._buf):
+            # Move the unread tail to the front, into a bigger buffer if needed
+            unread = self._end - self._start
+            if n > len(self._buf):
+                buf = bytearray(max(n, 2 * len(self._buf)))
+                buf[:unread] = self._view[self._start:self._end]
+                self._buf = buf
+                self._view = memoryview(buf)
+            else:
+                self._view[:unread] = self._view[self._start:self._end]
+            self._start, self._end = 0, unread
+        
+        while self._end - self._start < n:
+            received = self.sock.recv_into(self._view[self._end:])
+            if not received:
+                raise ConnectionError("Connection closed by peer")
+            self._end += received
+    
+    def close(self) -> None:
+        """
+        Close the socket.
+        """
+        self.sock.close()
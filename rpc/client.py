@@ -2,9 +2,57 @@
 RPC Client implementation
 """
 
+import itertools
+import logging
 import socket
-import msgpack
-from typing import Any, Union
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union, cast
+
+from . import codecs
+from .codecs import Request, Response
+from ._framing import (
+    CALL, CODEC_MASK, HELLO, KIND_MASK, PROTOCOL_VERSION, RESOLVE, RESULT,
+    Connection, decode_varint, encode_varint,
+)
+
+log = logging.getLogger("rpc")
+
+
+def _open_socket(host: str, port: int, nagle: bool = False) -> socket.socket:
+    """
+    Open a TCP connection to the RPC server, tuned for small request/response frames.
+    
+    Nagle's algorithm is disabled unless nagle is True, so small frames are
+    sent immediately instead of waiting to be coalesced.
+    """
+    try:
+        sock = socket.create_connection((host, port))
+    except Exception as e:
+        raise ConnectionError(f"Failed to connect to {host}:{port}: {e}")
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0 if nagle else 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    return sock
+
+
+def _handshake(conn: Connection) -> None:
+    """
+    Check that the server speaks the same protocol version.
+    
+    Raises:
+        ConnectionError: If it does not
+    """
+    conn.send_frame(encode_varint(PROTOCOL_VERSION), HELLO)
+    frame_type, data = conn.recv_frame()
+    if frame_type != HELLO:
+        # Servers predating the handshake answer with an error message
+        raise ConnectionError(f"Server does not support protocol version {PROTOCOL_VERSION}")
+    version, _ = decode_varint(data, 0)
+    if version != PROTOCOL_VERSION:
+        raise ConnectionError(
+            f"Server speaks protocol version {version}, expected {PROTOCOL_VERSION}"
+        )
 
 
 class RPCResult:
@@ -36,8 +84,16 @@ class RPCResult:
         """Convert result to list"""
         return list(self.value)
     
-    def as_dict(self) -> dict:
-        """Convert result to dictionary"""
+    def as_dict(self) -> Any:
+        """
+        Convert result to dictionary.
+        
+        Returns a new dict, except with the "flatbuf" codec, where a map result
+        is returned as the read-only view over the received buffer rather than
+        a decoded copy. (Typed as Any since that view is not a dict.)
+        """
+        if isinstance(self.value, Mapping) and not isinstance(self.value, dict):
+            return self.value
         return dict(self.value)
     
     def get(self) -> Any:
@@ -51,6 +107,154 @@ class RPCResult:
         return f"RPCResult({self.value!r})"
 
 
+class RPCFuture:
+    """
+    Pending result of a call made with Client.call_async().
+    
+    Several calls can be in flight on the same connection at once; responses
+    are matched to their request by id when result() is called.
+    """
+    
+    def __init__(self, client: "Client", request_id: int):
+        self.client = client
+        self.request_id = request_id
+        self._done = False
+        self._result: Optional[RPCResult] = None
+        self._error: Optional[Exception] = None
+    
+    def result(self) -> RPCResult:
+        """
+        Wait for the response and return it.
+        
+        Raises:
+            RuntimeError: If the remote call fails
+            ConnectionError: If there's a connection issue
+        """
+        if not self._done:
+            try:
+                self._result = self.client._wait(self.request_id)
+            except Exception as e:
+                self._error = e
+            self._done = True
+        if self._error is not None:
+            raise self._error
+        assert self._result is not None
+        return self._result
+    
+    def done(self) -> bool:
+        """Return True if the response has already been collected"""
+        return self._done
+
+
+class ClientPool:
+    """
+    Pool of keep-alive connections to one RPC server.
+    
+    Connections are opened on demand up to max_size and handed out one caller
+    at a time, so several threads can make calls concurrently without
+    reconnecting. The most recently returned connection is reused first.
+    """
+    
+    def __init__(self, host: str, port: int, max_size: int = 8, nagle: bool = False):
+        """
+        Initialize the connection pool.
+        
+        Args:
+            host: Server hostname or IP address
+            port: Server port number
+            max_size: Maximum number of open connections
+            nagle: Keep Nagle's algorithm enabled (better for bulk transfers)
+        """
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.nagle = nagle
+        self.closed = False
+        self._idle: List[Connection] = []
+        self._size = 0
+        self._cond = threading.Condition()
+    
+    def get(self) -> Connection:
+        """
+        Take a connection from the pool, opening one if none is idle.
+        
+        Blocks while max_size connections are already checked out.
+        """
+        with self._cond:
+            while True:
+                if self.closed:
+                    raise ConnectionError("Connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                self._cond.wait()
+        
+        try:
+            conn = Connection(_open_socket(self.host, self.port, self.nagle))
+            try:
+                _handshake(conn)
+            except Exception:
+                conn.close()
+                raise
+            return conn
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+    
+    def put(self, conn: Connection) -> None:
+        """
+        Return a healthy connection to the pool.
+        """
+        with self._cond:
+            if self.closed:
+                self._size -= 1
+                conn.close()
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+    
+    def on_disconnected(self, conn: Connection) -> None:
+        """
+        Drop a broken connection; a new one is opened on the next get().
+        """
+        conn.close()
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+    
+    @contextmanager
+    def checkout(self) -> Iterator[Connection]:
+        """
+        Borrow a connection for the duration of a with-block.
+        
+        If the block raises, the connection may hold a partial frame, so it is
+        dropped instead of being returned to the pool.
+        """
+        conn = self.get()
+        try:
+            yield conn
+        except BaseException:
+            self.on_disconnected(conn)
+            raise
+        self.put(conn)
+    
+    def close(self) -> None:
+        """
+        Close all idle connections; checked-out ones are closed when returned.
+        """
+        with self._cond:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+
 class Client:
     """
     RPC Client for making remote procedure calls.
@@ -59,31 +263,105 @@ class Client:
     - Connect to an RPC server
     - Call remote functions with parameters
     - Get typed results
+    
+    Calls go over a pool of keep-alive connections, so a single client can be
+    shared between threads.
     """
     
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, pool_size: int = 8, nagle: bool = False,
+                 codec: str = "msgpack"):
         """
         Initialize the RPC client.
         
         Args:
             host: Server hostname or IP address
             port: Server port number
+            pool_size: Maximum number of connections kept open to the server
+            nagle: Keep Nagle's algorithm enabled (better for bulk transfers,
+                worse for the latency of small calls)
+            codec: Wire codec, "msgpack" or "flatbuf" (zero-copy results for
+                large payloads; needs the flatbuffers package)
         """
         self.host = host
         self.port = port
-        self.socket: socket.socket = None
+        self._codec = codecs.get_codec(codec)
+        self._pool = ClientPool(host, port, max_size=pool_size, nagle=nagle)
+        self._encoder = self._codec.Encoder()
+        self._decoder = self._codec.response_decoder()
+        self._result_decoder = self._codec.result_decoder()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        # Connection held by call_async() while pipelined calls are in flight
+        self._pipeline: Optional[Connection] = None
+        # Ids of the calls sent on it whose responses have not been collected yet
+        self._pending: Set[int] = set()
+        self._responses: Dict[int, Response] = {}
         self._connect()
     
+    @property
+    def connected(self) -> bool:
+        """True until close() is called"""
+        return not self._pool.closed
+    
     def _connect(self) -> None:
         """
-        Establish connection to the RPC server.
+        Establish the first connection to the RPC server.
         """
-        try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
-            print(f"Connected to RPC server at {self.host}:{self.port}")
-        except Exception as e:
-            raise ConnectionError(f"Failed to connect to {self.host}:{self.port}: {e}")
+        self._pool.put(self._pool.get())
+        log.debug("Connected to RPC server at %s:%s", self.host, self.port)
+    
+    @staticmethod
+    def _build_params(args: tuple, kwargs: dict) -> Any:
+        """
+        Build the params of a call from its arguments: [args] or [args, kwargs].
+        """
+        if kwargs:
+            return [list(args), kwargs]
+        return [list(args)]
+    
+    def _build_request(self, method_name: str, args: tuple, kwargs: dict) -> Request:
+        """
+        Build the request for a call.
+        """
+        return Request(method=method_name, params=self._build_params(args, kwargs),
+                       id=next(self._ids))
+    
+    def _decode(self, frame_type: int, data: memoryview) -> Union[Response, List[Response]]:
+        """
+        Decode a response frame with the codec named in its header.
+        """
+        codec_id = frame_type & CODEC_MASK
+        if frame_type & KIND_MASK == RESULT:
+            # Only sent in reply to our CALL frames, so always in our codec
+            request_id, pos = decode_varint(data, 0)
+            return Response(result=self._result_decoder.decode(data[pos:]), id=request_id)
+        if codec_id == self._codec.CODEC_ID:
+            return self._decoder.decode(data)
+        # The server answers in its default codec when it cannot use ours
+        return codecs.get_codec(codec_id).response_decoder().decode(data)
+    
+    def _resolve(self, conn: Connection, method_name: str) -> Response:
+        """
+        Ask the server for the method id of a name, caching it on the connection.
+        """
+        conn.send_frame(self._encoder.encode(method_name), RESOLVE | self._codec.CODEC_ID)
+        response = cast(Response, self._decode(*conn.recv_frame()))
+        if response.error is None:
+            conn.method_ids[method_name] = response.result
+        return response
+    
+    @staticmethod
+    def _unwrap(response: Response) -> RPCResult:
+        """
+        Turn a response into an RPCResult, raising on remote errors.
+        """
+        if response.error is not None:
+            error_msg = response.error
+            if response.traceback is not None:
+                error_msg += f"\nServer traceback:\n{response.traceback}"
+            raise RuntimeError(f"Remote call failed: {error_msg}")
+        
+        return RPCResult(response.result)
     
     def call(self, method_name: str, *args, **kwargs) -> RPCResult:
         """
@@ -101,55 +379,163 @@ class Client:
             RuntimeError: If the remote call fails
             ConnectionError: If there's a connection issue
         """
-        if not self.socket:
-            raise ConnectionError("Not connected to server")
+        request_id = next(self._ids)
         
-        # Prepare the request
-        if args and kwargs:
-            # If both args and kwargs are provided, combine them
-            params = list(args) + [kwargs]
-        elif kwargs:
-            params = kwargs
-        else:
-            params = list(args)
+        try:
+            params_data = self._encoder.encode(self._build_params(args, kwargs))
+            with self._pool.checkout() as conn:
+                # Calls are sent as compact CALL frames, with the method id the
+                # server gave for the name on this connection in place of the name
+                method_id = conn.method_ids.get(method_name)
+                if method_id is None:
+                    response = self._resolve(conn, method_name)
+                    method_id = conn.method_ids.get(method_name)
+                if method_id is not None:
+                    prefix = encode_varint(method_id) + encode_varint(request_id)
+                    conn.send_frame(params_data, CALL | self._codec.CODEC_ID, prefix)
+                    # Decode before the connection goes back: the frame points into its buffer
+                    response = cast(Response, self._decode(*conn.recv_frame()))
+            
+            return self._unwrap(response)
+            
+        except socket.error as e:
+            raise ConnectionError(f"Communication error: {e}")
+        except Exception as e:
+            raise RuntimeError(f"Call failed: {e}")
+    
+    def call_batch(self, calls: List[Tuple[str, tuple]]) -> List[RPCResult]:
+        """
+        Call several remote functions in one round-trip.
         
-        request = {
-            "method": method_name,
-            "params": params
-        }
+        All requests are sent as a single frame and answered with a single frame.
+        
+        Args:
+            calls: List of (method_name, args) tuples
+            
+        Returns:
+            List of RPCResult objects, in the same order as calls
+            
+        Raises:
+            RuntimeError: If any of the remote calls fails
+            ConnectionError: If there's a connection issue
+        """
+        if not calls:
+            return []
+        
+        requests = [
+            Request(method=method_name, params=[list(args)], id=i)
+            for i, (method_name, args) in enumerate(calls)
+        ]
         
         try:
-            # Send the request
-            request_data = msgpack.packb(request)
-            self.socket.send(request_data)
+            request_data = self._encoder.encode(requests)
+            with self._pool.checkout() as conn:
+                conn.send_frame(request_data, self._codec.CODEC_ID)
+                responses = self._decode(*conn.recv_frame())
+            
+            if isinstance(responses, Response):
+                # The server could not read the batch at all
+                return [self._unwrap(responses)]
+            
+            by_id = {response.id: response for response in responses}
+            return [self._unwrap(by_id[i]) for i in range(len(requests))]
+            
+        except socket.error as e:
+            raise ConnectionError(f"Communication error: {e}")
+        except Exception as e:
+            raise RuntimeError(f"Call failed: {e}")
+    
+    def call_async(self, method_name: str, *args, **kwargs) -> RPCFuture:
+        """
+        Send a call without waiting for its response.
+        
+        Further calls can be issued before the response arrives; they are
+        pipelined over one pooled connection, which returns to the pool once
+        every in-flight response has been collected.
+        
+        Args:
+            method_name: Name of the remote function to call
+            *args: Positional arguments to pass to the function
+            **kwargs: Keyword arguments to pass to the function
             
-            # Receive the response
-            response_data = self.socket.recv(4096)
-            response = msgpack.unpackb(response_data, raw=False)
+        Returns:
+            RPCFuture whose result() returns the RPCResult
             
-            # Check for errors
-            if "error" in response:
-                error_msg = response["error"]
-                if "traceback" in response:
-                    error_msg += f"\nServer traceback:\n{response['traceback']}"
-                raise RuntimeError(f"Remote call failed: {error_msg}")
+        Raises:
+            ConnectionError: If there's a connection issue
+        """
+        request = self._build_request(method_name, args, kwargs)
+        request_data = self._encoder.encode(request)
+        
+        with self._lock:
+            if self._pipeline is None:
+                self._pipeline = self._pool.get()
+            try:
+                self._pipeline.send_frame(request_data, self._codec.CODEC_ID)
+            except socket.error as e:
+                self._drop_pipeline()
+                raise ConnectionError(f"Communication error: {e}")
+            self._pending.add(request.id)
+        
+        return RPCFuture(self, request.id)
+    
+    def _wait(self, request_id: int) -> RPCResult:
+        """
+        Read pipelined responses until the one for request_id arrives.
+        
+        Responses for other in-flight calls are kept until they are collected.
+        """
+        try:
+            with self._lock:
+                if request_id not in self._pending:
+                    # The call was sent on a pipeline that has since been dropped
+                    raise ConnectionError("Connection lost before the response arrived")
+                try:
+                    while request_id not in self._responses:
+                        # Pending calls always have a pipeline to read from
+                        pipeline = self._pipeline
+                        assert pipeline is not None
+                        response = cast(Response, self._decode(*pipeline.recv_frame()))
+                        # Errors raised before the server could read the id go to the current caller
+                        response_id = request_id if response.id is None else response.id
+                        self._responses[response_id] = response
+                except Exception:
+                    # The connection may be left in the middle of a frame
+                    self._drop_pipeline()
+                    raise
+                
+                response = self._responses.pop(request_id)
+                self._pending.discard(request_id)
+                if not self._pending and self._pipeline is not None:
+                    self._pool.put(self._pipeline)
+                    self._pipeline = None
             
-            # Return the result wrapped in RPCResult
-            return RPCResult(response.get("result"))
+            return self._unwrap(response)
             
         except socket.error as e:
             raise ConnectionError(f"Communication error: {e}")
         except Exception as e:
             raise RuntimeError(f"Call failed: {e}")
     
+    def _drop_pipeline(self) -> None:
+        """
+        Discard the pipelined connection after a failure; its pending calls fail.
+        """
+        if self._pipeline is not None:
+            self._pool.on_disconnected(self._pipeline)
+            self._pipeline = None
+        self._pending.clear()
+        self._responses.clear()
+    
     def close(self) -> None:
         """
-        Close the connection to the server.
+        Close the connections to the server.
         """
-        if self.socket:
-            self.socket.close()
-            self.socket = None
-            print("Disconnected from RPC server")
+        if self.connected:
+            with self._lock:
+                self._drop_pipeline()
+            self._pool.close()
+            log.debug("Disconnected from RPC server")
     
     def __enter__(self):
         """Context manager entry"""
@@ -160,5 +546,6 @@ class Client:
         self.close()
     
     def __del__(self):
-        """Destructor to ensure socket is closed"""
-        self.close() 
\ No newline at end of file
+        """Destructor to ensure the connections are closed"""
+        if hasattr(self, "_pool"):
+            self.close()
\ No newline at end of file
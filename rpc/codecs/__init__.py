@@ -0,0 +1,62 @@
+"""
+Pluggable wire codecs
+
+Every frame header carries a one-byte codec id, so each message says how it
+is encoded and the server answers in the codec the client used. A codec
+module provides:
+    
+    CODEC_ID            the id sent in frame headers
+    Encoder()           an object whose encode(obj) returns bytes
+    request_decoder()   an object whose decode(buf) returns a Request or a list of them
+    response_decoder()  an object whose decode(buf) returns a Response or a list of them
+    params_decoder()    an object whose decode(buf) returns the params of a compact call
+    result_decoder()    an object whose decode(buf) returns the result of a compact call
+
+Requests and responses are the typed structs defined here whatever the codec.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Any, Optional, Union
+
+import msgspec
+
+
+class Request(msgspec.Struct, omit_defaults=True):
+    """A single remote call"""
+    method: str
+    params: Any = msgspec.field(default_factory=list)
+    id: int = 0
+
+
+class Response(msgspec.Struct, omit_defaults=True):
+    """The outcome of a remote call: either a result or an error"""
+    result: Any = None
+    error: Optional[str] = None
+    traceback: Optional[str] = None
+    id: Optional[int] = None
+
+
+# Codec name -> wire id; the module of the same name in this package implements it
+CODEC_IDS = {
+    "msgpack": 0,
+    "flatbuf": 1,
+}
+_NAMES = {codec_id: name for name, codec_id in CODEC_IDS.items()}
+
+
+def get_codec(codec: Union[str, int]) -> ModuleType:
+    """
+    Look up a codec by name or wire id.
+    
+    Raises:
+        ValueError: If the codec is unknown or its optional dependency is missing
+    """
+    name = _NAMES.get(codec) if isinstance(codec, int) else codec
+    if name not in CODEC_IDS:
+        raise ValueError(f"Unknown codec {codec!r}")
+    
+    try:
+        return importlib.import_module(f"{__name__}.{name}")
+    except ImportError as e:
+        raise ValueError(f"Codec '{name}' is not available: {e}")
@@ -0,0 +1,156 @@
+"""
+FlexBuffers codec (the schema-less flavour of FlatBuffers)
+
+The FlexBuffers wire format can be read in place, so the result of a call
+is not decoded up front: containers in it are exposed as read-only views
+that read fields straight from the received buffer when accessed. This
+pays off for large results of which only a few fields are used.
+
+Requires the optional flatbuffers package.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterator, List, Union
+
+import msgspec
+from flatbuffers import flexbuffers  # type: ignore[import-untyped]
+
+from . import CODEC_IDS, Request, Response
+
+CODEC_ID = CODEC_IDS["flatbuf"]
+
+
+def _view(ref: flexbuffers.Ref) -> Any:
+    """
+    Wrap containers in lazy views; return scalars as Python values.
+    """
+    if ref.IsMap:
+        return MapView(ref.AsMap)
+    if ref.IsVector or ref.IsTypedVector or ref.IsFixedTypedVector:
+        return VectorView(ref.AsVector if ref.IsVector else ref.Value)
+    return ref.Value
+
+
+class MapView(Mapping):
+    """Read-only dict-like view of a FlexBuffers map"""
+    
+    def __init__(self, fmap: flexbuffers.Map):
+        self._map = fmap
+    
+    def __getitem__(self, key: str) -> Any:
+        if not isinstance(key, str):
+            raise KeyError(key)
+        return _view(self._map[key])
+    
+    def __iter__(self) -> Iterator[str]:
+        for key in self._map.Keys:
+            yield key.AsKey
+    
+    def __len__(self) -> int:
+        return len(self._map)
+    
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class VectorView(Sequence):
+    """Read-only list-like view of a FlexBuffers vector"""
+    
+    def __init__(self, vector: Any):
+        self._vector = vector
+    
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("vector index out of range")
+        item = self._vector[index]
+        return _view(item) if isinstance(item, flexbuffers.Ref) else item
+    
+    def __len__(self) -> int:
+        return len(self._vector)
+    
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, (str, bytes)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class Encoder:
+    """Encodes messages (structs, lists of structs or plain values) to FlexBuffers"""
+    
+    def encode(self, obj: Any) -> bytes:
+        # Keep binary values as blobs instead of letting msgspec base64-encode them
+        builtins = msgspec.to_builtins(obj, builtin_types=(bytes, bytearray, memoryview))
+        return bytes(flexbuffers.Dumps(builtins))
+
+
+class _RequestDecoder:
+    """Decodes requests fully; they are small and every field is needed"""
+    
+    def decode(self, buf: Any) -> Union[Request, List[Request]]:
+        return msgspec.convert(flexbuffers.Loads(bytes(buf)), Union[Request, List[Request]])
+
+
+class _ParamsDecoder:
+    """Decodes call params fully, since they are passed on as plain lists and dicts"""
+    
+    def decode(self, buf: Any) -> Any:
+        return flexbuffers.Loads(bytes(buf))
+
+
+class _ResultDecoder:
+    """Decodes a call result as a view over the buffer"""
+    
+    def decode(self, buf: Any) -> Any:
+        # Copy once: the connection reuses its receive buffer for the next frame
+        return _view(flexbuffers.GetRoot(bytes(buf)))
+
+
+class _ResponseDecoder:
+    """Decodes responses, leaving the result as a view over the buffer"""
+    
+    def decode(self, buf: Any) -> Union[Response, List[Response]]:
+        # Copy once: the connection reuses its receive buffer for the next frame
+        root = flexbuffers.GetRoot(bytes(buf))
+        if root.IsMap:
+            return self._response(root.AsMap)
+        return [self._response(ref.AsMap) for ref in root.AsVector]
+    
+    @staticmethod
+    def _response(fields: flexbuffers.Map) -> Response:
+        response = Response()
+        for key, value in zip(fields.Keys, fields.Values):
+            name = key.AsKey
+            if name == "result":
+                response.result = _view(value)
+            elif name in ("error", "traceback"):
+                setattr(response, name, value.AsString)
+            elif name == "id":
+                response.id = value.AsInt
+        return response
+
+
+def request_decoder() -> _RequestDecoder:
+    """Create a decoder for a single request or a batch of requests"""
+    return _RequestDecoder()
+
+
+def response_decoder() -> _ResponseDecoder:
+    """Create a decoder for a single response or a batch of responses"""
+    return _ResponseDecoder()
+
+
+def params_decoder() -> _ParamsDecoder:
+    """Create a decoder for the params of a compact call"""
+    return _ParamsDecoder()
+
+
+def result_decoder() -> _ResultDecoder:
+    """Create a decoder for the result of a compact call"""
+    return _ResultDecoder()
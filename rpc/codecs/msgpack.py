@@ -0,0 +1,38 @@
+"""
+MessagePack codec, encoded and decoded by msgspec's compiled implementation
+
+Requests and responses are decoded straight into typed structs instead of
+generic dictionaries.
+"""
+
+from typing import List, Union
+
+import msgspec
+
+from . import CODEC_IDS, Request, Response
+
+CODEC_ID = CODEC_IDS["msgpack"]
+
+# Encoders and decoders are not free to build, so callers create them once
+# (per client, per server connection) and reuse them for every message
+Encoder = msgspec.msgpack.Encoder
+
+
+def request_decoder() -> msgspec.msgpack.Decoder:
+    """Create a decoder for a single request or a batch of requests"""
+    return msgspec.msgpack.Decoder(Union[Request, List[Request]])
+
+
+def response_decoder() -> msgspec.msgpack.Decoder:
+    """Create a decoder for a single response or a batch of responses"""
+    return msgspec.msgpack.Decoder(Union[Response, List[Response]])
+
+
+def params_decoder() -> msgspec.msgpack.Decoder:
+    """Create a decoder for the params of a compact call"""
+    return msgspec.msgpack.Decoder()
+
+
+def result_decoder() -> msgspec.msgpack.Decoder:
+    """Create a decoder for the result of a compact call"""
+    return msgspec.msgpack.Decoder()
@@ -2,14 +2,136 @@
 RPC Server implementation
 """
 
+import asyncio
+import functools
+import os
+import selectors
 import socket
+import sys
 import threading
-import msgpack
 import json
 import inspect
-from typing import Dict, Callable, Any, Optional
+import logging
+import multiprocessing
+import itertools
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import ClassVar, Deque, Dict, Callable, Any, List, NoReturn, Optional, Set, Tuple, Union
 import traceback
 
+from . import codecs
+from .codecs import Request, Response
+from ._framing import (
+    CALL, CODEC_MASK, HEADER, HELLO, KIND_MASK, MESSAGE, PROTOCOL_VERSION, RESOLVE, RESULT,
+    Connection, check_frame_length, decode_varint, encode_varint, _HAS_SENDMSG,
+)
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (e.g. not available on Windows)
+    uvloop = None  # type: ignore[assignment]
+
+log = logging.getLogger("rpc")
+
+# A bound function together with what bind() worked out about it once, up front
+_Entry = namedtuple("_Entry", "func signature dispatch method_id cpu_bound const")
+
+# A connection's encoder and decoders for one codec
+_Coders = namedtuple("_Coders", "encoder requests params")
+
+# Used to answer frames whose codec is unknown, since every client can read it
+_DEFAULT_CODEC = codecs.get_codec("msgpack")
+
+# Default of bind()'s const argument, since None is a valid constant
+_UNSET: Any = object()
+
+_POSITIONAL = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+
+def constant(func: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Mark a function taking no arguments as returning the same value every time.
+    
+    bind() then calls it once and serves its result as a constant, as with
+    bind(name, const=func()).
+    """
+    func._rpc_constant = True  # type: ignore[attr-defined]
+    return func
+
+
+def _call_with_params(func: Callable, params: Any) -> Any:
+    """
+    Call func with params in their wire form: [args] or [args, kwargs].
+    """
+    if params.__class__ is list and params and params[0].__class__ is list:
+        if len(params) == 1:
+            return func(*params[0])
+        if len(params) == 2 and params[1].__class__ is dict:
+            return func(*params[0], **params[1])
+    elif params == []:
+        # Requests default to empty params
+        return func()
+    raise TypeError("params must be [args] or [args, kwargs]")
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_dispatcher(arity: int) -> Callable[[Callable, Any], Any]:
+    """
+    Generate a dispatcher for functions taking a given number of positional
+    arguments.
+    
+    The generated code calls f(a[0], ..., a[k-1]) on the args of [args]
+    params, indexing the list directly instead of unpacking it with *args.
+    Anything else falls back to _call_with_params, which also reports
+    argument errors as usual. Dispatchers take the function as an argument,
+    so each arity is compiled once.
+    """
+    args = ", ".join(f"a[{i}]" for i in range(arity))
+    src = (
+        "def dispatch(f, p):\n"
+        "    if p.__class__ is list and len(p) == 1:\n"
+        "        a = p[0]\n"
+        f"        if a.__class__ is list and len(a) == {arity}:\n"
+        f"            return f({args})\n"
+        "    return _call_with_params(f, p)\n"
+    )
+    
+    namespace = {"_call_with_params": _call_with_params}
+    exec(src, namespace)
+    return namespace["dispatch"]
+
+
+def _make_dispatcher(signature: Optional[inspect.Signature]) -> Callable[[Callable, Any], Any]:
+    """
+    Pick the dispatcher used to call a bound function with request params.
+    
+    Functions taking only plain positional parameters without defaults get a
+    specialized generated dispatcher; anything else goes through the general
+    _call_with_params.
+    """
+    if signature is None:
+        return _call_with_params
+    
+    params = signature.parameters.values()
+    if all(p.kind in _POSITIONAL and p.default is inspect.Parameter.empty for p in params):
+        return _compile_dispatcher(len(params))
+    return _call_with_params
+
+
+class _SelectorClient:
+    """
+    A client connection served by the "selector" mode loop.
+    """
+    
+    __slots__ = ("sock", "address", "inbuf", "outbuf", "coders")
+    
+    def __init__(self, sock: socket.socket, address: tuple, coders: Dict[int, _Coders]):
+        self.sock = sock
+        self.address = address
+        self.inbuf = bytearray()  # received bytes not yet handled (at most a partial frame)
+        self.outbuf: Deque[Union[bytes, memoryview]] = deque()  # response bytes not yet sent
+        self.coders = coders
+
 
 class Server:
     """
@@ -21,146 +143,732 @@ class Server:
     - Automatically capture function signatures
     """
     
-    def __init__(self, port: int, host: str = "0.0.0.0"):
+    # ClassVar keeps this a class attribute when compiled with mypyc
+    MODES: ClassVar[Tuple[str, ...]] = ("asyncio", "thread", "selector")
+    
+    def __init__(self, port: int, host: str = "0.0.0.0", nagle: bool = False,
+                 backlog: int = 1024, mode: str = "asyncio",
+                 max_workers: Optional[int] = None, max_pending: int = 64,
+                 debug: bool = False, workers: int = 1):
         """
         Initialize the RPC server.
         
         Args:
             port: Port number to listen on
             host: Host address to bind to (default: localhost)
+            nagle: Keep Nagle's algorithm enabled on client connections
+                (better for bulk transfers, worse for the latency of small calls)
+            backlog: Maximum number of pending connections
+            mode: "asyncio" to serve all clients from one event loop,
+                "thread" to serve each client from a bounded pool of threads, or
+                "selector" to serve all clients from one thread without
+                asyncio (a lightweight fallback when uvloop is not available)
+            max_workers: Number of worker threads in "thread" mode
+                (default: min(32, 4 * CPU count)); each connected client
+                holds a worker until it disconnects
+            max_pending: In "thread" mode, how many accepted clients may wait
+                for a free worker before new ones are turned away
+            debug: Send the server-side traceback along with errors raised
+                by bound functions (formatting it is costly, so it is off by default)
+            workers: Number of processes serving the port. With more than one,
+                run() forks workers - 1 copies of the server, each listening
+                on the port with SO_REUSEPORT so the kernel spreads incoming
+                connections across them. Bind every function before run();
+                state kept in the server process is not shared between them
         """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown server mode '{mode}', expected one of {self.MODES}")
+        if workers > 1 and not (hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")):
+            raise ValueError("workers > 1 needs os.fork() and SO_REUSEPORT, "
+                             "which this platform does not provide")
+        
         self.host = host
         self.port = port
-        self.functions: Dict[str, Callable] = {}
+        self.nagle = nagle
+        self.backlog = backlog
+        self.mode = mode
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.max_pending = max_pending
+        self.debug = debug
+        self.workers = workers
+        self.functions: Dict[str, _Entry] = {}
+        self._by_id: List[_Entry] = []
         self.server_socket: Optional[socket.socket] = None
         self.running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._shutdown: Optional[asyncio.Event] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        self._wakeup: Optional[socket.socket] = None
+        # Worker processes forked by run(), and the event that stops them
+        self._children: List[int] = []
+        self._stop_event: Optional[Any] = None
+        self._is_worker = False
+        self._clients: Set[socket.socket] = set()
+        self._clients_lock = threading.Lock()
         
-    def bind(self, name: str, func: Callable) -> None:
+    def bind(self, name: str, func: Optional[Callable] = None, *,
+             cpu_bound: bool = False, const: Any = _UNSET) -> int:
         """
         Bind a function to a name for RPC calls.
         
         Args:
             name: The name to bind the function to
             func: The function to bind (can be a regular function, lambda, or method)
+            cpu_bound: Run the function in a pool of worker processes, so long
+                computations do not hold the GIL while other clients wait.
+                The function, its arguments and its result must be picklable
+                (a lambda is not)
+            const: Answer every call with this value instead of calling a
+                function (func may then be omitted). The result is encoded
+                once, and the arguments of compact calls are not even decoded.
+                Functions marked with @constant are treated the same way.
+            
+        Returns:
+            The method id used for the name in compact CALL frames; binding
+            a name again replaces the function but keeps its id
         """
-        self.functions[name] = func
-        print(f"Bound function '{name}' with signature: {inspect.signature(func)}")
+        if const is _UNSET and getattr(func, "_rpc_constant", False):
+            const = func()  # type: ignore[misc]
+        if const is not _UNSET:
+            value = const
+            func = lambda *args, **kwargs: value
+            cpu_bound = False
+        elif func is None:
+            raise TypeError("bind() needs a function or a const value")
+        
+        try:
+            signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            # Some builtins do not expose a signature
+            signature = None
+        
+        # Interned names make the per-request lookup an identity comparison
+        name = sys.intern(name)
+        previous = self.functions.get(name)
+        method_id = previous.method_id if previous is not None else len(self._by_id)
+        
+        dispatch = _make_dispatcher(signature)
+        if cpu_bound:
+            if self._cpu_pool is None:
+                self._cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+            dispatch = self._dispatch_in_process
+        encoded: Optional[Dict[int, bytes]] = None
+        if const is not _UNSET:
+            # Encoded results by codec id; other codecs are added on first use
+            encoded = {_DEFAULT_CODEC.CODEC_ID: _DEFAULT_CODEC.Encoder().encode(const)}
+        entry = _Entry(func, signature, dispatch, method_id, cpu_bound, encoded)
+        
+        self.functions[name] = entry
+        if previous is not None:
+            self._by_id[method_id] = entry
+        else:
+            self._by_id.append(entry)
+        if encoded is not None:
+            log.debug("Bound constant '%s': %r", name, const)
+        else:
+            log.debug("Bound function '%s' with signature: %s", name, signature)
+        return method_id
+    
+    async def _handle_client(self, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+        """
+        Handle a client connection as a coroutine on the event loop.
+        
+        Args:
+            reader: Stream reader for the client connection
+            writer: Stream writer for the client connection
+        """
+        address = writer.get_extra_info("peername")
+        log.debug("Client connected from %s", address)
+        
+        client_socket = writer.get_extra_info("socket")
+        if client_socket is not None:
+            self._configure_client_socket(client_socket)
+        
+        # The same encoders/decoders serve every frame on this connection
+        coders = self._new_coders()
+        
+        try:
+            while self.running:
+                # Receive one length-prefixed frame
+                try:
+                    header = await reader.readexactly(HEADER.size)
+                    length, frame_type = HEADER.unpack(header)
+                    check_frame_length(length)
+                    data = await reader.readexactly(length)
+                except asyncio.IncompleteReadError:
+                    break
+                
+                # Send response
+                if self._cpu_pool is not None and self._may_block(frame_type, data):
+                    # Wait for worker processes on a thread, not on the event loop
+                    frame_type, prefix, response_data = await asyncio.get_running_loop().run_in_executor(
+                        None, self._handle_frame, frame_type, data, coders
+                    )
+                else:
+                    frame_type, prefix, response_data = self._handle_frame(frame_type, data, coders)
+                writer.writelines((
+                    HEADER.pack(len(prefix) + len(response_data), frame_type),
+                    prefix,
+                    response_data,
+                ))
+                await writer.drain()
+                    
+        except asyncio.CancelledError:
+            # The server is shutting down
+            pass
+        except Exception as e:
+            log.warning("Error handling client %s: %s", address, e)
+        finally:
+            writer.close()
+            log.debug("Client %s disconnected", address)
     
-    def _handle_client(self, client_socket: socket.socket, address: tuple) -> None:
+    def _handle_client_thread(self, client_socket: socket.socket, address: tuple) -> None:
         """
-        Handle a client connection in a separate thread.
+        Handle a client connection on a worker thread ("thread" mode).
         
         Args:
             client_socket: The client socket
             address: Client address tuple
         """
-        print(f"Client connected from {address}")
+        log.debug("Client connected from %s", address)
+        
+        # The same encoders/decoders and receive buffer serve every frame on this connection
+        coders = self._new_coders()
+        conn = Connection(client_socket)
         
         try:
             while self.running:
-                # Receive data
-                data = client_socket.recv(4096)
-                if not data:
+                try:
+                    frame_type, data = conn.recv_frame()
+                except ConnectionError:
                     break
                 
-                try:
-                    # Unpack the request
-                    request = msgpack.unpackb(data, raw=False)
-                    
-                    # Process the request
-                    response = self._process_request(request)
-                    
-                    # Send response
-                    response_data = msgpack.packb(response)
-                    client_socket.send(response_data)
-                    
-                except Exception as e:
-                    # Send error response
-                    error_response = {
-                        "error": str(e),
-                        "traceback": traceback.format_exc()
-                    }
-                    error_data = msgpack.packb(error_response)
-                    client_socket.send(error_data)
-                    
+                frame_type, prefix, response_data = self._handle_frame(frame_type, data, coders)
+                conn.send_frame(response_data, frame_type, prefix)
+                
         except Exception as e:
-            print(f"Error handling client {address}: {e}")
+            if self.running:
+                log.warning("Error handling client %s: %s", address, e)
         finally:
+            with self._clients_lock:
+                self._clients.discard(client_socket)
             client_socket.close()
-            print(f"Client {address} disconnected")
+            log.debug("Client %s disconnected", address)
     
-    def _process_request(self, request: dict) -> dict:
+    def _dispatch_in_process(self, func: Callable, params: Any) -> Any:
         """
-        Process an RPC request and return the response.
+        Dispatcher of cpu_bound functions: call func in a worker process.
+        
+        Generated dispatchers cannot be pickled, so the general
+        _call_with_params is run in the worker instead.
+        """
+        assert self._cpu_pool is not None
+        return self._cpu_pool.submit(_call_with_params, func, params).result()
+    
+    def _may_block(self, frame_type: int, data: Union[bytes, memoryview]) -> bool:
+        """
+        Whether handling a frame may wait on a cpu_bound function.
+        
+        A CALL frame names its method up front; full messages (batches and
+        pipelined calls) would have to be decoded to tell.
+        """
+        kind = frame_type & KIND_MASK
+        if kind == RESOLVE or kind == HELLO:
+            return False
+        if kind == CALL:
+            try:
+                return self._by_id[decode_varint(data, 0)[0]].cpu_bound
+            except IndexError:
+                return False
+        return True
+    
+    def _configure_client_socket(self, client_socket: socket.socket) -> None:
+        """
+        Apply per-connection socket options to an accepted client.
+        """
+        # Send small responses immediately instead of letting Nagle's algorithm hold them
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0 if self.nagle else 1)
+    
+    @staticmethod
+    def _make_coders(codec: Any) -> _Coders:
+        """
+        Create the encoder and decoders a connection uses for one codec.
+        """
+        return _Coders(codec.Encoder(), codec.request_decoder(), codec.params_decoder())
+    
+    @classmethod
+    def _new_coders(cls) -> Dict[int, _Coders]:
+        """
+        Create the coders of a new connection, by codec id.
+        
+        Only the default codec is set up front; others are added on first use.
+        """
+        return {_DEFAULT_CODEC.CODEC_ID: cls._make_coders(_DEFAULT_CODEC)}
+    
+    def _handle_frame(self, frame_type: int, data: Union[bytes, memoryview],
+                      coders: Dict[int, _Coders]) -> Tuple[int, bytes, bytes]:
+        """
+        Decode one request frame, process it and return the encoded response.
+        
+        The response is encoded with the same codec as the request.
         
         Args:
-            request: The request dictionary containing method name and parameters
+            frame_type: The frame type from the header (frame kind and codec id)
+            data: The frame payload (without the header)
+            coders: The connection's coders by codec id
             
         Returns:
-            Response dictionary with result or error
+            Tuple of the response frame type, the bytes to send before the
+            payload (the varints of a RESULT frame) and the encoded payload
         """
+        kind = frame_type & KIND_MASK
+        codec_id = frame_type & CODEC_MASK
+        if kind == HELLO:
+            # The client checks that the versions match
+            return HELLO, b"", encode_varint(PROTOCOL_VERSION)
+        if codec_id not in coders:
+            try:
+                codec = codecs.get_codec(codec_id)
+            except ValueError as e:
+                encoder = coders[_DEFAULT_CODEC.CODEC_ID].encoder
+                return _DEFAULT_CODEC.CODEC_ID, b"", encoder.encode(Response(error=str(e)))
+            coders[codec_id] = self._make_coders(codec)
+        coder = coders[codec_id]
+        encoder = coder.encoder
+        
+        if kind == CALL:
+            return self._handle_call(codec_id, data, coder)
+        
         try:
-            method_name = request.get("method")
-            params = request.get("params", [])
-            
-            if method_name not in self.functions:
-                return {"error": f"Method '{method_name}' not found"}
-            
-            func = self.functions[method_name]
-            
-            # Call the function with parameters
-            if isinstance(params, list):
-                result = func(*params)
-            elif isinstance(params, dict):
-                result = func(**params)
+            # Unpack the request
+            if kind == RESOLVE:
+                name = coder.params.decode(data)
+            elif kind == MESSAGE:
+                request = coder.requests.decode(data)
             else:
-                result = func(params)
+                raise ValueError(f"unknown frame type {frame_type:#04x}")
+        except Exception as e:
+            # A malformed frame: a traceback of the server's decoder would not help the client
+            return codec_id, b"", encoder.encode(Response(error=f"Invalid request: {e}"))
+        
+        if kind == RESOLVE:
+            return codec_id, b"", encoder.encode(self._resolve(name))
+        
+        try:
+            # Process the request, or every request of a batch
+            response: Union[Response, List[Response]]
+            if request.__class__ is list:
+                response = [self._process_request(item) for item in request]
+            else:
+                response = self._process_request(request)
+            return codec_id, b"", encoder.encode(response)
             
-            return {"result": result}
+        except Exception as e:
+            # Send error response
+            return codec_id, b"", encoder.encode(self._error_response(e))
+    
+    def _handle_call(self, codec_id: int, data: Union[bytes, memoryview],
+                     coder: _Coders) -> Tuple[int, bytes, bytes]:
+        """
+        Process a compact CALL frame.
+        
+        The result is returned in a RESULT frame; errors are returned as a
+        regular Response, which the client tells apart by the frame kind.
+        """
+        try:
+            method_id, pos = decode_varint(data, 0)
+            request_id, pos = decode_varint(data, pos)
+        except IndexError as e:
+            return codec_id, b"", coder.encoder.encode(Response(error=f"Invalid request: {e}"))
+        
+        if method_id >= len(self._by_id):
+            error = Response(error=f"Unknown method id {method_id}", id=request_id)
+            return codec_id, b"", coder.encoder.encode(error)
+        
+        entry = self._by_id[method_id]
+        if entry.const is not None:
+            result = entry.const.get(codec_id)
+            if result is None:
+                result = entry.const[codec_id] = coder.encoder.encode(entry.func())
+            return RESULT | codec_id, encode_varint(request_id), result
+        
+        try:
+            params = coder.params.decode(data[pos:])
+        except Exception as e:
+            error = Response(error=f"Invalid request: {e}", id=request_id)
+            return codec_id, b"", coder.encoder.encode(error)
+        
+        try:
+            result = coder.encoder.encode(entry.dispatch(entry.func, params))
+        except Exception as e:
+            return codec_id, b"", coder.encoder.encode(self._error_response(e, request_id))
+        return RESULT | codec_id, encode_varint(request_id), result
+    
+    def _resolve(self, name: Any) -> Response:
+        """
+        Answer a RESOLVE frame with the method id bound to a name.
+        """
+        entry = self.functions.get(name) if isinstance(name, str) else None
+        if entry is None:
+            return Response(error=f"Method '{name}' not found")
+        return Response(result=entry.method_id)
+    
+    def _process_request(self, request: Request) -> Response:
+        """
+        Process an RPC request and return the response.
+        
+        The response echoes the request id so pipelined and batched calls can
+        be matched. In debug mode, a traceback is captured for exceptions
+        raised by the called function, not for a missing method.
+        
+        Args:
+            request: The request containing method name and parameters
             
+        Returns:
+            Response with result or error
+        """
+        entry = self.functions.get(request.method)
+        if entry is None:
+            return Response(error=f"Method '{request.method}' not found", id=request.id)
+        
+        try:
+            return Response(result=entry.dispatch(entry.func, request.params), id=request.id)
         except Exception as e:
-            return {
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
+            return self._error_response(e, request.id)
+    
+    def _error_response(self, e: Exception, request_id: Optional[int] = None) -> Response:
+        """
+        Build the response for an exception raised while handling a request.
+        
+        Must be called from the except block, so the traceback is available.
+        """
+        if self.debug:
+            return Response(error=f"{type(e).__name__}: {e}",
+                            traceback=traceback.format_exc(), id=request_id)
+        return Response(error=f"{type(e).__name__}: {e}", id=request_id)
     
     def run(self) -> None:
         """
         Start the server and run the main loop (blocking).
         This is similar to srv.run() in the C++ version.
+        
+        In "asyncio" mode connections are served by an event loop, backed by
+        uvloop when it is installed. In "thread" mode each connection is
+        handled by a worker from a bounded thread pool. In "selector" mode
+        the calling thread multiplexes all connections with a selector.
+        
+        With workers > 1, worker processes are forked first and serve the
+        port the same way; stop() stops them too.
+        """
+        try:
+            if self.workers > 1:
+                self._fork_workers()
+            self._run_mode()
+        except Exception as e:
+            log.error("Server error: %s", e)
+        finally:
+            self.stop()
+    
+    def _run_mode(self) -> None:
+        """
+        Serve clients in the configured mode until the server is stopped.
+        """
+        if self.mode == "thread":
+            self._run_threads()
+        elif self.mode == "selector":
+            self._run_selector()
+        else:
+            self._run_asyncio()
+    
+    def _fork_workers(self) -> None:
+        """
+        Fork the worker processes; they return only by exiting.
+        """
+        self._stop_event = multiprocessing.Event()
+        for _ in range(self.workers - 1):
+            pid = os.fork()
+            if pid == 0:
+                self._run_worker()
+            self._children.append(pid)
+        log.info("Started %d worker processes", self.workers - 1)
+    
+    def _run_worker(self) -> NoReturn:
+        """
+        Serve clients in a forked worker process until the parent stops the server.
+        """
+        self._children = []
+        self._is_worker = True
+        if self._cpu_pool is not None:
+            # The parent's process pool cannot be shared; each worker gets its own
+            self._cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        threading.Thread(target=self._wait_for_stop, daemon=True).start()
+        
+        status = 0
+        try:
+            self._run_mode()
+        except Exception as e:
+            log.error("Server error: %s", e)
+            status = 1
+        finally:
+            self.stop()
+            # Never return into the caller of run(), which belongs to the parent
+            os._exit(status)
+    
+    def _wait_for_stop(self) -> None:
+        """
+        In a worker process, stop the server once the parent asks for it.
+        """
+        assert self._stop_event is not None
+        self._stop_event.wait()
+        self.stop()
+    
+    def _listen(self) -> socket.socket:
+        """
+        Create the listening socket.
+        """
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.workers > 1:
+            # Every worker process listens on the port with its own socket
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server_socket.bind((self.host, self.port))
+        server_socket.listen(self.backlog)
+        return server_socket
+    
+    def _run_asyncio(self) -> None:
+        """
+        Serve clients from an event loop until the server is stopped.
+        """
+        loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+        
+        try:
+            loop.run_until_complete(self._serve())
+        finally:
+            # Cancel handlers still waiting on idle clients before closing the loop
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+    
+    async def _serve(self) -> None:
+        """
+        Open the listening socket and serve clients until the server is stopped.
         """
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket = self._listen()
+        
+        self._loop = asyncio.get_running_loop()
+        self._shutdown = asyncio.Event()
+        self._server = await asyncio.start_server(
+            self._handle_client, sock=self.server_socket, backlog=self.backlog
+        )
+        self.running = True
+        
+        log.info("RPC Server listening on %s:%s", self.host, self.port)
+        log.info("Available methods: %s", list(self.functions.keys()))
         
         try:
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
-            self.running = True
+            await self._shutdown.wait()
+        finally:
+            self._server.close()
+    
+    def _run_threads(self) -> None:
+        """
+        Accept clients and hand them to a bounded pool of worker threads
+        until the server is stopped.
+        """
+        self.server_socket = self._listen()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                        thread_name_prefix="rpc-worker")
+        self.running = True
+        
+        log.info("RPC Server listening on %s:%s", self.host, self.port)
+        log.info("Available methods: %s", list(self.functions.keys()))
+        
+        while self.running:
+            try:
+                client_socket, address = self.server_socket.accept()
+            except socket.error as e:
+                if self.running:
+                    log.error("Socket error: %s", e)
+                break
+            
+            self._configure_client_socket(client_socket)
             
-            print(f"RPC Server listening on {self.host}:{self.port}")
-            print(f"Available methods: {list(self.functions.keys())}")
+            with self._clients_lock:
+                overloaded = len(self._clients) >= self.max_workers + self.max_pending
+                if not overloaded:
+                    self._clients.add(client_socket)
             
+            if overloaded:
+                log.warning("Too many connections, rejecting client %s", address)
+                client_socket.close()
+                continue
+            
+            self._pool.submit(self._handle_client_thread, client_socket, address)
+    
+    def _run_selector(self) -> None:
+        """
+        Serve all clients from this thread with a selector until the server
+        is stopped ("selector" mode).
+        
+        Sockets are non-blocking: each readable client is read once, every
+        complete frame received is answered, and responses the socket cannot
+        take right away are sent once it becomes writable. A client is not
+        read from while it has unsent responses, so a client that does not
+        read cannot make the server buffer without bound. Functions bound
+        with cpu_bound=True block the loop while they run.
+        """
+        self.server_socket = self._listen()
+        self.server_socket.setblocking(False)
+        # stop() writes to the other end to wake up select()
+        wakeup, self._wakeup = socket.socketpair()
+        
+        sel = selectors.DefaultSelector()
+        sel.register(self.server_socket, selectors.EVENT_READ)
+        sel.register(wakeup, selectors.EVENT_READ)
+        # Receive buffer shared by all clients, since they are read one at a time
+        scratch = memoryview(bytearray(65536))
+        self.running = True
+        
+        log.info("RPC Server listening on %s:%s", self.host, self.port)
+        log.info("Available methods: %s", list(self.functions.keys()))
+        
+        try:
             while self.running:
-                try:
-                    client_socket, address = self.server_socket.accept()
-                    
-                    # Handle each client in a separate thread
-                    client_thread = threading.Thread(
-                        target=self._handle_client,
-                        args=(client_socket, address),
-                        daemon=True
-                    )
-                    client_thread.start()
-                    
-                except socket.error as e:
-                    if self.running:
-                        print(f"Socket error: {e}")
-                    break
-                    
-        except Exception as e:
-            print(f"Server error: {e}")
+                for key, events in sel.select():
+                    client = key.data
+                    if client is None:
+                        if key.fileobj is self.server_socket:
+                            self._selector_accept(sel)
+                        continue
+                    try:
+                        if events & selectors.EVENT_READ:
+                            self._selector_read(sel, client, scratch)
+                        else:
+                            self._selector_write(sel, client)
+                    except Exception as e:
+                        log.warning("Error handling client %s: %s", client.address, e)
+                        self._selector_close(sel, client)
         finally:
-            self.stop()
+            for key in list(sel.get_map().values()):
+                if key.data is not None:
+                    self._selector_close(sel, key.data)
+            sel.close()
+            wakeup.close()
+            # Cleared before closing; stop() may still hold the socket, but
+            # sending to it once closed only raises OSError, which it ignores
+            waker, self._wakeup = self._wakeup, None
+            waker.close()
+            self.server_socket.close()
+    
+    def _selector_accept(self, sel: selectors.BaseSelector) -> None:
+        """
+        Accept every pending client and register it with the selector.
+        """
+        assert self.server_socket is not None
+        while True:
+            try:
+                client_socket, address = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                log.error("Socket error: %s", e)
+                return
+            
+            log.debug("Client connected from %s", address)
+            self._configure_client_socket(client_socket)
+            client_socket.setblocking(False)
+            client = _SelectorClient(client_socket, address, self._new_coders())
+            sel.register(client_socket, selectors.EVENT_READ, client)
+    
+    def _selector_read(self, sel: selectors.BaseSelector, client: _SelectorClient,
+                       scratch: memoryview) -> None:
+        """
+        Read what a client sent and queue a response to every complete frame.
+        """
+        try:
+            received = client.sock.recv_into(scratch)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            received = 0
+        if not received:
+            self._selector_close(sel, client)
+            return
+        
+        inbuf = client.inbuf
+        inbuf += scratch[:received]
+        pos = 0
+        # Frames are handled as views of inbuf; none may outlive the with-block,
+        # since inbuf cannot be resized while viewed
+        with memoryview(inbuf) as view:
+            while len(inbuf) - pos >= HEADER.size:
+                length, frame_type = HEADER.unpack_from(inbuf, pos)
+                # Checked before waiting for the rest, so inbuf stays bounded
+                check_frame_length(length)
+                end = pos + HEADER.size + length
+                if end > len(inbuf):
+                    break
+                
+                frame_type, prefix, payload = self._handle_frame(
+                    frame_type, view[pos + HEADER.size:end], client.coders
+                )
+                client.outbuf.append(HEADER.pack(len(prefix) + len(payload), frame_type))
+                if prefix:
+                    client.outbuf.append(prefix)
+                client.outbuf.append(payload)
+                pos = end
+        del inbuf[:pos]
+        
+        if client.outbuf and not self._selector_flush(client):
+            # Wait until the client takes the responses before reading more
+            sel.modify(client.sock, selectors.EVENT_WRITE, client)
+    
+    def _selector_write(self, sel: selectors.BaseSelector, client: _SelectorClient) -> None:
+        """
+        Send queued responses to a client that became writable.
+        """
+        if self._selector_flush(client):
+            sel.modify(client.sock, selectors.EVENT_READ, client)
+    
+    @staticmethod
+    def _selector_flush(client: _SelectorClient) -> bool:
+        """
+        Send as much queued output as the socket takes without blocking.
+        
+        Returns:
+            True if everything was sent
+        """
+        outbuf = client.outbuf
+        while outbuf:
+            try:
+                if _HAS_SENDMSG:
+                    # Bounded to stay well below the system's limit on buffers per call
+                    sent = client.sock.sendmsg(list(itertools.islice(outbuf, 256)))
+                else:
+                    sent = client.sock.send(outbuf[0])
+            except (BlockingIOError, InterruptedError):
+                return False
+            
+            while outbuf and sent >= len(outbuf[0]):
+                sent -= len(outbuf.popleft())
+            if sent:
+                outbuf[0] = memoryview(outbuf[0])[sent:]
+        return True
+    
+    @staticmethod
+    def _selector_close(sel: selectors.BaseSelector, client: _SelectorClient) -> None:
+        """
+        Unregister and close a client connection.
+        """
+        sel.unregister(client.sock)
+        client.sock.close()
+        log.debug("Client %s disconnected", client.address)
     
     def async_run(self) -> threading.Thread:
         """
@@ -179,6 +887,50 @@ class Server:
         Stop the server.
         """
         self.running = False
-        if self.server_socket:
+        loop = self._loop
+        # Read once: the selector loop clears it from its own thread on exit
+        waker = self._wakeup
+        if loop is not None and not loop.is_closed() and self._shutdown is not None:
+            # The listener is owned by the event loop, so wake it up from there
+            loop.call_soon_threadsafe(self._shutdown.set)
+        elif waker is not None:
+            # The selector loop closes the listener itself once woken up
+            try:
+                waker.send(b"\0")
+            except OSError:
+                pass
+        elif self.server_socket:
+            try:
+                # Wakes up a thread blocked in accept()
+                self.server_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
             self.server_socket.close()
-        print("Server stopped") 
\ No newline at end of file
+        
+        if self._pool is not None:
+            # Disconnect clients so workers blocked in recv() can exit
+            with self._clients_lock:
+                clients = list(self._clients)
+            for client_socket in clients:
+                try:
+                    client_socket.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._cpu_pool is not None:
+            # Worker processes exit with os._exit(), skipping the interpreter's
+            # cleanup that would otherwise wait for the pool's processes
+            self._cpu_pool.shutdown(wait=self._is_worker, cancel_futures=True)
+        
+        if self._children:
+            # Tell the worker processes to stop and reap them; stop() may run
+            # on two threads at once, so both wait until every worker is gone
+            assert self._stop_event is not None
+            self._stop_event.set()
+            for pid in self._children:
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+            self._children = []
+        log.info("Server stopped") 
\ No newline at end of file
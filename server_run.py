@@ -9,6 +9,7 @@ It shows how to:
 - Run the server loop
 """
 
+import logging
 import sys
 import os
 
@@ -25,6 +26,9 @@ def foo():
 
 
 def main():
+    # Show the server's startup messages (connections are logged at DEBUG level)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Creating a server that listens on port 8080
     srv = Server(8080)
     
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Setup script for the Python RPC library
+
+Set RPC_USE_MYPYC=1 to compile the transport, client and server modules to
+C extensions with mypyc (mypy must be installed in the build environment):
+
+    RPC_USE_MYPYC=1 python setup.py build_ext --inplace
+    RPC_USE_MYPYC=1 pip install --no-build-isolation .
+
+Without it the package installs as pure Python with the same API.
+"""
+
+import os
+
+from setuptools import find_packages, setup
+
+# The codecs stay interpreted: their msgspec.Struct subclasses cannot be compiled
+MYPYC_MODULES = ["rpc/_framing.py", "rpc/client.py", "rpc/server.py"]
+
+ext_modules = []
+if os.environ.get("RPC_USE_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(MYPYC_MODULES)
+
+with open(os.path.join(os.path.dirname(__file__), "requirements.txt")) as f:
+    install_requires = [line.strip() for line in f if line.strip()]
+
+setup(
+    name="rpc",
+    version="1.0.0",
+    description="A simple RPC implementation similar to C++ rpclib",
+    packages=find_packages(include=["rpc", "rpc.*"]),
+    install_requires=install_requires,
+    extras_require={"flatbuf": ["flatbuffers"]},
+    ext_modules=ext_modules,
+    python_requires=">=3.9",
+)